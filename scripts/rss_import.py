@@ -5,22 +5,38 @@ RSS -> Hugo posts with professional rewrite (sports journalism style)
 - Bilingual: EN & EL directly via Cloudflare Workers AI
 - Not-too-short newsroom summary (3–7 paragraphs)
 - Adds source attribution at the end
-- Dedupe via .state/posted.json
+- Dedupe via .state/posted.jsonl
 - Cover download from enclosure/media/first <img>
 """
 
-import os, re, json, time, hashlib, pathlib, html, asyncio
+import os, re, io, json, time, math, hashlib, pathlib, html, asyncio, sqlite3, multiprocessing
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from datetime import datetime
+from itertools import chain
+from operator import mul
 from urllib.parse import urlparse
-from typing import Dict, Any, Optional, List, Tuple
+from typing import Optional, List, Tuple
 
 import yaml
 import feedparser
-import frontmatter
 import httpx
-from bs4 import BeautifulSoup
+import orjson
+from lxml import etree, html as lxml_html
+from PIL import Image, ImageCms, ImageOps
 from slugify import slugify
 
+try:
+    import feedparser_rs  # Rust parser with the feedparser entry API
+except ImportError:
+    feedparser_rs = None
+
+try:
+    from yaml import CSafeLoader as YamlLoader  # libyaml
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
+
 # --- Paths ---
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 CONTENT_EN = ROOT / "content" / "en" / "posts"
@@ -28,42 +44,99 @@ CONTENT_EL = ROOT / "content" / "el" / "posts"
 COVERS_DIR = ROOT / "static" / "images" / "covers"
 STATE_DIR = ROOT / ".state"
 STATE_FILE = STATE_DIR / "posted.json"
+STATE_JSONL = STATE_DIR / "posted.jsonl"
+LLM_CACHE_FILE = STATE_DIR / "llm_cache.sqlite"
 FEEDS_FILE = ROOT / "config" / "feeds.yml"
 
 # --- Env / Config ---
-DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "").strip()  # fallback only
+DEEPL_API_KEY = os.getenv("DEEPL_API_KEY", "").strip()  # EL fallback, and EL for short items
+DEEPL_SHORT_TEXT = int(os.getenv("DEEPL_SHORT_TEXT", "").strip() or 400)  # feed text below this many chars
 CF_ACCOUNT_ID = os.getenv("CF_ACCOUNT_ID", "").strip()
 CF_API_TOKEN  = os.getenv("CF_API_TOKEN", "").strip()
 CF_MODEL      = os.getenv("CF_MODEL", "@cf/meta/llama-3.1-70b-instruct").strip()
 
+# Semantic rewrite cache: reuse an earlier rewrite when the feed text embeds this close
+# (cosine) to one already done. Unset/0 disables it.
+SIMILARITY_THRESHOLD = float(os.getenv("SIMILARITY_THRESHOLD", "0").strip() or 0)
+CF_EMBED_MODEL = "@cf/baai/bge-small-en-v1.5"
+# Exact-prompt cache lifetime in seconds, for local re-runs and retries; in CI every prompt
+# carries a new entry's link, so it stays off there. Unset/0 disables it.
+PROMPT_CACHE_TTL = int(os.getenv("PROMPT_CACHE_TTL", "0").strip() or 0)
+
 TIMEZONE_OFFSET = "+02:00"  # ok for timestamp string
+FEED_CONCURRENCY = 8        # feeds fetched/rewritten at the same time
+MAX_ENTRIES = 20            # newest entries considered per feed
+ENTRY_CONCURRENCY = 4       # entries of one feed rewritten at the same time
+MAX_COVER_BYTES = 8_000_000  # larger covers are skipped
+COVER_MAX_SIDE = 1600        # px; covers are re-encoded down to this
+SEMANTIC_CACHE_SCAN = 2000  # newest cached rewrites compared per lookup
+
+# in-flight requests per external service, across all feeds and entries
+CF_SEM = asyncio.Semaphore(8)
+DEEPL_SEM = asyncio.Semaphore(5)  # DeepL throttles bursts of parallel requests
+IMAGE_SEM = asyncio.Semaphore(8)
 
 # ---------- helpers ----------
 
 def load_yaml(path: pathlib.Path):
     with path.open("r", encoding="utf-8") as f:
-        return yaml.safe_load(f)
+        return yaml.load(f, Loader=YamlLoader)
+
+def write_atomic(path: pathlib.Path, data: bytes):
+    # an interrupted run leaves the old file in place instead of a truncated one
+    tmp = path.with_name(path.name + ".tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+# "seen" lives in posted.jsonl, one {"sig", "link", "title", "slug", "ts"} line per posted entry;
+# posted.json keeps the rest. Older posted.json files still carry "seen" as {sig: record}.
 
 def load_state():
-    if not STATE_FILE.exists():
-        return {"seen": {}}
-    try:
-        with STATE_FILE.open("r", encoding="utf-8") as f:
-            return json.load(f)
-    except Exception:
-        return {"seen": {}}
+    state = {}
+    if STATE_FILE.exists():
+        try:
+            state = orjson.loads(STATE_FILE.read_bytes())
+        except Exception:
+            state = {}
+    legacy = state.pop("seen", None) or {}
+    seen = dict(legacy)
+    lines = bad = 0
+    if STATE_JSONL.exists():
+        with STATE_JSONL.open("rb") as f:
+            for line in f:
+                lines += 1
+                try:
+                    rec = orjson.loads(line)
+                    seen[rec.pop("sig")] = rec
+                except Exception:  # torn tail from an interrupted append
+                    bad += 1
+    # fold legacy records in and drop torn or superseded lines
+    if legacy or bad or lines > 10 * len(seen):
+        compact_seen(seen)
+    state["seen"] = seen
+    return state
+
+def compact_seen(seen):
+    STATE_DIR.mkdir(parents=True, exist_ok=True)
+    write_atomic(STATE_JSONL, b"".join(orjson.dumps({"sig": sig, **rec}) + b"\n" for sig, rec in seen.items()))
+
+def append_seen(sig: str, rec: dict):
+    with STATE_JSONL.open("ab") as f:
+        f.write(orjson.dumps({"sig": sig, **rec}) + b"\n")
 
 def save_state(state):
     STATE_DIR.mkdir(parents=True, exist_ok=True)
-    with STATE_FILE.open("w", encoding="utf-8") as f:
-        json.dump(state, f, ensure_ascii=False, indent=2)
+    rest = {k: v for k, v in state.items() if k != "seen"}
+    write_atomic(STATE_FILE, orjson.dumps(rest, option=orjson.OPT_INDENT_2))
 
 def hash_id(s: str) -> str:
-    return hashlib.sha256(s.encode("utf-8")).hexdigest()[:24]
+    return hashlib.blake2b(s.encode("utf-8"), digest_size=12).hexdigest()
+
+_WS_RE = re.compile(r"\s+")
 
 def clean_text(t: str) -> str:
     t = html.unescape(t or "")
-    t = re.sub(r"\s+", " ", t).strip()
+    t = _WS_RE.sub(" ", t).strip()
     return t
 
 def build_date(dt_struct) -> str:
@@ -76,15 +149,51 @@ def build_date(dt_struct) -> str:
 
 def first_image_from_html(html_text: str) -> Optional[str]:
     try:
-        soup = BeautifulSoup(html_text or "", "html.parser")
-        img = soup.find("img")
-        if img and img.get("src"):
-            return img["src"]
+        if not (html_text or "").strip():
+            return None
+        root = lxml_html.fragment_fromstring(html_text, create_parent="body")
+        img = next(root.iter("img"), None)
+        if img is not None and img.get("src"):
+            return img.get("src")
     except Exception:
         pass
     return None
 
+def optimize_cover(path: pathlib.Path) -> pathlib.Path:
+    """Downscale a cover to COVER_MAX_SIDE and store it as progressive JPEG.
+
+    Returns the file to reference, which is `path` itself when the image is
+    already a small enough JPEG, has transparency, or can't be read by Pillow.
+    """
+    out = path.with_suffix(".jpg")
+    tmp = out.with_name(out.name + ".tmp")
+    try:
+        with Image.open(path) as im:
+            if im.format == "JPEG" and max(im.size) <= COVER_MAX_SIDE:
+                return path
+            if "A" in im.getbands() or "transparency" in im.info:
+                return path
+            im.draft("RGB", (COVER_MAX_SIDE, COVER_MAX_SIDE))  # JPEG: decode at reduced scale
+            im = ImageOps.exif_transpose(im)  # the re-encode drops EXIF, so bake the rotation in
+            icc = im.info.get("icc_profile")
+            if icc and im.mode == "CMYK":
+                im = ImageCms.profileToProfile(im, io.BytesIO(icc), ImageCms.createProfile("sRGB"), outputMode="RGB")
+                icc = None
+            elif im.mode not in ("RGB", "P"):
+                icc = None  # a grey or other non-RGB profile doesn't describe the RGB output
+            im = im.convert("RGB")
+            im.thumbnail((COVER_MAX_SIDE, COVER_MAX_SIDE), Image.Resampling.LANCZOS)
+            im.save(tmp, "JPEG", quality=82, optimize=True, progressive=True, subsampling=2, icc_profile=icc)
+    except Exception:
+        tmp.unlink(missing_ok=True)
+        return path
+    os.replace(tmp, out)
+    if out != path:
+        path.unlink(missing_ok=True)
+    return out
+
 async def download_image(client: httpx.AsyncClient, url: str, dest_dir: pathlib.Path, base_slug: str) -> Optional[str]:
+    partial = None
     try:
         dest_dir.mkdir(parents=True, exist_ok=True)
         ext = pathlib.Path(urlparse(url).path).suffix.lower()
@@ -92,14 +201,64 @@ async def download_image(client: httpx.AsyncClient, url: str, dest_dir: pathlib.
             ext = ".jpg"
         filename = f"{base_slug}-cover{ext}"
         dest_path = dest_dir / filename
-        r = await client.get(url, timeout=30)
-        if r.status_code == 200 and r.content:
-            dest_path.write_bytes(r.content)
-            return f"/images/covers/{filename}"
+        async with IMAGE_SEM, client.stream("GET", url, timeout=30) as r:
+            if r.status_code != 200:
+                return None
+            if int(r.headers.get("content-length") or 0) > MAX_COVER_BYTES:
+                return None
+            size = 0
+            partial = dest_path
+            with dest_path.open("wb") as f:
+                async for chunk in r.aiter_bytes(64 * 1024):
+                    size += len(chunk)
+                    if size > MAX_COVER_BYTES:  # no or wrong Content-Length
+                        break
+                    f.write(chunk)
+        if 0 < size <= MAX_COVER_BYTES:
+            final = await run_cpu(optimize_cover, dest_path)
+            return f"/images/covers/{final.name}"
     except Exception:
-        return None
+        pass
+    if partial is not None:
+        partial.unlink(missing_ok=True)  # drop empty or truncated downloads
     return None
 
+# json.dumps escapes C0 controls; YAML also rejects these raw or reads them as line breaks
+_YAML_UNSAFE_RE = re.compile("[\x7f-\x9f\u2028\u2029\ufeff]")
+
+def fm_value(v) -> str:
+    # JSON scalars, arrays and objects are valid YAML flow nodes
+    return _YAML_UNSAFE_RE.sub(lambda m: f"\\u{ord(m.group()):04x}", json.dumps(v, ensure_ascii=False))
+
+def write_post(path: pathlib.Path, body: str, fm: dict):
+    header = "\n".join(f"{k}: {fm_value(v)}" for k, v in fm.items())
+    write_atomic(path, f"---\n{header}\n---\n\n{body.strip()}\n".encode("utf-8"))
+
+_cpu_pool: Optional[ProcessPoolExecutor] = None
+
+async def run_cpu(fn, *args):
+    """Run a CPU-bound, module-level (picklable) function in the worker process pool."""
+    global _cpu_pool
+    if _cpu_pool is None:
+        # forkserver: the pool starts mid-run, when forking a process with live threads can deadlock
+        _cpu_pool = ProcessPoolExecutor(max_workers=os.cpu_count(),
+                                        mp_context=multiprocessing.get_context("forkserver"))
+    pool = _cpu_pool
+    try:
+        return await asyncio.get_running_loop().run_in_executor(pool, fn, *args)
+    except BrokenProcessPool:
+        # a worker died (e.g. OOM-killed in Pillow); later calls get a fresh pool
+        if _cpu_pool is pool:
+            _cpu_pool = None
+            pool.shutdown(wait=False)
+        raise
+
+def shutdown_cpu_pool():
+    global _cpu_pool
+    if _cpu_pool is not None:
+        _cpu_pool.shutdown()
+        _cpu_pool = None
+
 def ensure_dirs():
     CONTENT_EN.mkdir(parents=True, exist_ok=True)
     CONTENT_EL.mkdir(parents=True, exist_ok=True)
@@ -108,12 +267,18 @@ def ensure_dirs():
 
 # ---------- Cloudflare Workers AI ----------
 
-def cf_endpoint() -> str:
+def cf_endpoint(model: str = "") -> str:
     if not CF_ACCOUNT_ID:
         raise RuntimeError("CF_ACCOUNT_ID env is missing")
-    model = CF_MODEL or "@cf/meta/llama-3.1-70b-instruct"
+    model = model or CF_MODEL or "@cf/meta/llama-3.1-70b-instruct"
     return f"https://api.cloudflare.com/client/v4/accounts/{CF_ACCOUNT_ID}/ai/run/{model}"
 
+try:
+    CF_ENDPOINT = cf_endpoint()
+    CF_EMBED_ENDPOINT = cf_endpoint(CF_EMBED_MODEL)
+except RuntimeError:  # no account configured: calling cf_endpoint() again reports it per request
+    CF_ENDPOINT = CF_EMBED_ENDPOINT = ""
+
 CF_REWRITE_SYSTEM_PROMPT = (
     "You are a professional European basketball news writer. "
     "Rewrite the provided feed content into an original, newsroom-quality article.\n"
@@ -143,15 +308,39 @@ def build_user_prompt(title: str, text: str, lang: str, source_name: str, source
         ]
     }
 
-async def cf_rewrite(client: httpx.AsyncClient, title: str, text: str, lang: str, source_name: str, source_url: str) -> Optional[str]:
+def build_bilingual_prompt(title: str, text: str, source_name: str, source_url: str) -> dict:
+    user = (
+        "Write the article twice: once in English and once in Greek, in clean journalistic Greek.\n"
+        'Return only a JSON object of the form {"en": "<English article>", "el": "<Greek article>"}.\n\n'
+        f"Title: {title}\n\n"
+        f"Feed content:\n{text}\n\n"
+        f"End the English article with this exact source line:\nSource: {source_name} ({source_url})\n"
+        f"End the Greek article with this exact source line:\nΠηγή: {source_name} ({source_url})"
+    )
+    return {
+        "messages": [
+            {"role": "system", "content": CF_REWRITE_SYSTEM_PROMPT},
+            {"role": "user", "content": user},
+        ],
+        "max_tokens": 2048,  # two full articles
+    }
+
+async def cf_run(client: httpx.AsyncClient, payload: dict, label: str) -> Optional[str]:
     if not CF_API_TOKEN:
         raise RuntimeError("CF_API_TOKEN env is missing")
-    payload = build_user_prompt(title, text, lang, source_name, source_url)
+    # identical model + payload (prompt, source line, limits) -> reuse the earlier generation
+    body = orjson.dumps(payload)
+    key = hashlib.sha256(CF_MODEL.encode("utf-8") + b"\n" + body).hexdigest()
+    if PROMPT_CACHE_TTL:
+        row = llm_cache().execute("SELECT body FROM prompts WHERE key = ?", (key,)).fetchone()
+        if row:
+            return row[0]
     headers = {"Authorization": f"Bearer {CF_API_TOKEN}", "Content-Type": "application/json"}
     try:
-        r = await client.post(cf_endpoint(), json=payload, headers=headers, timeout=60)
+        async with CF_SEM:
+            r = await client.post(CF_ENDPOINT or cf_endpoint(), content=body, headers=headers, timeout=60)
         r.raise_for_status()
-        jd = r.json()
+        jd = orjson.loads(r.content)
         result = jd.get("result") or {}
         out = result.get("response")
         if not out:
@@ -162,30 +351,154 @@ async def cf_rewrite(client: httpx.AsyncClient, title: str, text: str, lang: str
                     content = node.get("content")
                     if isinstance(content, list) and content and isinstance(content[0], dict):
                         out = content[0].get("text")
-        return (out or "").strip() or None
+        out = (out or "").strip() or None
+    except Exception as e:
+        print(f"[CF] rewrite failed ({label}): {e}")
+        return None
+    if out and PROMPT_CACHE_TTL:
+        llm_cache().execute(
+            "INSERT OR REPLACE INTO prompts (key, body, ts) VALUES (?, ?, ?)", (key, out, int(time.time()))
+        )
+    return out
+
+async def cf_rewrite(client: httpx.AsyncClient, title: str, text: str, lang: str, source_name: str, source_url: str) -> Optional[str]:
+    payload = build_user_prompt(title, text, lang, source_name, source_url)
+    return await cf_run(client, payload, lang)
+
+_JSON_OBJECT_RE = re.compile(r"\{.*\}", re.S)
+
+async def cf_rewrite_bilingual(client: httpx.AsyncClient, title: str, text: str, source_name: str, source_url: str) -> Optional[Tuple[str, str]]:
+    """EN and EL rewrites from a single generation; None if the reply isn't the expected JSON."""
+    out = await cf_run(client, build_bilingual_prompt(title, text, source_name, source_url), "EN+EL")
+    if not out:
+        return None
+    m = _JSON_OBJECT_RE.search(out)  # models like to wrap JSON in prose or code fences
+    try:
+        jd = json.loads(m.group(0), strict=False) if m else None
+    except ValueError:
+        jd = None
+    en = jd.get("en") if isinstance(jd, dict) else None
+    el = jd.get("el") if isinstance(jd, dict) else None
+    if isinstance(en, str) and isinstance(el, str) and en.strip() and el.strip():
+        return en.strip(), el.strip()
+    print("[CF] bilingual reply was not valid JSON, rewriting per language")
+    return None
+
+async def cf_embed(client: httpx.AsyncClient, text: str) -> Optional[List[float]]:
+    """Unit-length embedding of text, so cosine similarity is a dot product."""
+    if not CF_API_TOKEN:
+        raise RuntimeError("CF_API_TOKEN env is missing")
+    headers = {"Authorization": f"Bearer {CF_API_TOKEN}", "Content-Type": "application/json"}
+    try:
+        async with CF_SEM:
+            # bge-small reads 512 tokens at most
+            r = await client.post(CF_EMBED_ENDPOINT or cf_endpoint(CF_EMBED_MODEL),
+                                  content=orjson.dumps({"text": [text[:2000]]}), headers=headers, timeout=30)
+        r.raise_for_status()
+        vec = orjson.loads(r.content)["result"]["data"][0]
     except Exception as e:
-        print(f"[CF] rewrite failed ({lang}): {e}")
+        print(f"[CF] embedding failed: {e}")
+        return None
+    norm = math.sqrt(sum(x * x for x in vec)) or 1.0
+    return [x / norm for x in vec]
+
+# ---------- rewrite cache ----------
+
+_llm_cache: Optional[sqlite3.Connection] = None
+
+def llm_cache() -> sqlite3.Connection:
+    global _llm_cache
+    if _llm_cache is None:
+        STATE_DIR.mkdir(parents=True, exist_ok=True)
+        _llm_cache = sqlite3.connect(LLM_CACHE_FILE, isolation_level=None)
+        cols = {row[1] for row in _llm_cache.execute("PRAGMA table_info(semantic)")}
+        if cols and "link" not in cols:  # rows without their source link cannot be re-attributed
+            _llm_cache.execute("DROP TABLE semantic")
+        _llm_cache.execute(
+            "CREATE TABLE IF NOT EXISTS semantic ("
+            "id INTEGER PRIMARY KEY, vec BLOB NOT NULL, body_en TEXT NOT NULL, body_el TEXT NOT NULL, "
+            "link TEXT NOT NULL)"
+        )
+        _llm_cache.execute(
+            "CREATE TABLE IF NOT EXISTS prompts (key TEXT PRIMARY KEY, body TEXT NOT NULL, ts INTEGER NOT NULL)"
+        )
+        _llm_cache.execute("DELETE FROM prompts WHERE ts < ?", (int(time.time()) - PROMPT_CACHE_TTL,))
+        # lookups only scan the newest SEMANTIC_CACHE_SCAN rows
+        _llm_cache.execute(
+            "DELETE FROM semantic WHERE id <= (SELECT MAX(id) FROM semantic) - ?", (SEMANTIC_CACHE_SCAN,)
+        )
+        if _llm_cache.total_changes:
+            _llm_cache.execute("VACUUM")  # DELETE alone never shrinks the file
+    return _llm_cache
+
+def close_llm_cache():
+    global _llm_cache
+    if _llm_cache is not None:
+        _llm_cache.close()
+        _llm_cache = None
+
+def _closest_row(vec: List[float], rows: List[Tuple[int, bytes]]) -> Optional[int]:
+    query = array("f", vec)
+    best_id, best = None, SIMILARITY_THRESHOLD
+    for row_id, blob in rows:
+        cand = array("f")
+        cand.frombytes(blob)
+        score = sum(map(mul, query, cand))
+        if score >= best:
+            best_id, best = row_id, score
+    return best_id
+
+async def semantic_lookup(vec: List[float]) -> Optional[Tuple[str, str, str]]:
+    """(body_en, body_el, link) of the closest recent rewrite at or above SIMILARITY_THRESHOLD."""
+    db = llm_cache()
+    rows = db.execute("SELECT id, vec FROM semantic ORDER BY id DESC LIMIT ?", (SEMANTIC_CACHE_SCAN,)).fetchall()
+    # scoring ~2000 vectors in pure Python takes tens of ms; keep it off the event loop
+    best_id = await asyncio.to_thread(_closest_row, vec, rows)
+    if best_id is None:
+        return None
+    return db.execute("SELECT body_en, body_el, link FROM semantic WHERE id = ?", (best_id,)).fetchone()
+
+def semantic_store(vec: List[float], body_en: str, body_el: str, link: str):
+    llm_cache().execute(
+        "INSERT INTO semantic (vec, body_en, body_el, link) VALUES (?, ?, ?, ?)",
+        (array("f", vec).tobytes(), body_en, body_el, link),
+    )
+
+def with_source_line(body: str, old_link: str, source_line: str) -> Optional[str]:
+    """Swap the lines citing the cached rewrite's link for this entry's source line; None if none cite it."""
+    lines = body.rstrip().split("\n")
+    kept = [line for line in lines if old_link not in line]
+    if len(kept) == len(lines):
         return None
+    body = re.sub(r"\n{3,}", "\n\n", "\n".join(kept)).rstrip()
+    return f"{body}\n\n{source_line}"
 
 # ---------- DeepL fallback (EL only) ----------
 DEEPL_ENDPOINT = "https://api-free.deepl.com/v2/translate"
 
-async def deepl_translate(client: httpx.AsyncClient, text: str) -> str:
-    if not DEEPL_API_KEY:
-        return text
+async def deepl_translate(client: httpx.AsyncClient, texts: List[str]) -> List[str]:
+    """Translations in input order; any text that could not be translated comes back unchanged."""
+    if not DEEPL_API_KEY or not texts:
+        return list(texts)
     try:
-        data = {"auth_key": DEEPL_API_KEY, "text": text, "source_lang": "EN", "target_lang": "EL"}
-        r = await client.post(DEEPL_ENDPOINT, data=data, timeout=30)
+        data = {"auth_key": DEEPL_API_KEY, "text": texts, "source_lang": "EN", "target_lang": "EL"}
+        async with DEEPL_SEM:
+            r = await client.post(DEEPL_ENDPOINT, data=data, timeout=30)
         r.raise_for_status()
-        jd = r.json()
-        return jd["translations"][0]["text"]
+        out = [t["text"] for t in orjson.loads(r.content)["translations"]]
+        return out if len(out) == len(texts) else list(texts)
     except Exception:
-        return text
+        return list(texts)
 
 # ---------- feed parsing ----------
 
-def select_feed_text(entry) -> Tuple[str, str]:
-    title = clean_text(entry.get("title") or "")
+def parse_feed(content: bytes, headers: dict):
+    if feedparser_rs is not None:
+        limits = feedparser_rs.ParserLimits(max_entries=MAX_ENTRIES)
+        return feedparser_rs.parse_with_limits(content, limits=limits)
+    return feedparser.parse(content, response_headers=headers)
+
+def feed_html(entry) -> str:
     raw_html = None
     if entry.get("content"):
         try:
@@ -194,24 +507,28 @@ def select_feed_text(entry) -> Tuple[str, str]:
             raw_html = None
     if not raw_html:
         raw_html = entry.get("summary") or entry.get("description") or ""
-    soup = BeautifulSoup(raw_html or "", "html.parser")
-    paragraphs = [clean_text(p.get_text(" ", strip=True)) for p in soup.find_all(["p","div","li"])
-                  if clean_text(p.get_text(" ", strip=True))]
-    text = "\n\n".join(paragraphs) if paragraphs else clean_text(soup.get_text(" ", strip=True))
-    return title, text
-
-async def process_entry(client: httpx.AsyncClient, feed_meta: dict, entry, used_slugs_en: set):
-    link = entry.get("link") or ""
-    source_host = urlparse(link).netloc or urlparse(feed_meta.get("url","")).netloc or "source"
+    return raw_html
+
+def html_to_text(raw_html: str) -> str:
+    if not raw_html.strip():
+        return ""
+    # one lxml pass; entities are already decoded, so only whitespace needs collapsing
+    root = lxml_html.fragment_fromstring(raw_html, create_parent="body")
+    etree.strip_elements(root, "script", "style", with_tail=False)
+    paragraphs = [" ".join(" ".join(el.itertext()).split()) for el in root.iter("p", "div", "li")]
+    paragraphs = [t for t in paragraphs if t]
+    return "\n\n".join(paragraphs) if paragraphs else " ".join(" ".join(root.itertext()).split())
+
+async def process_entry(client: httpx.AsyncClient, feed_meta: dict, entry, used_slugs_en: set, sig: str,
+                        link: str, title: str, source_host: str, base_slug: str):
     source_name = source_host.replace("www.", "")
     published = build_date(entry.get("published_parsed"))
 
-    title, feed_text = select_feed_text(entry)
+    feed_text = html_to_text(feed_html(entry))
     if not title and not feed_text:
         return None
 
-    base_slug = slugify(title or link, lowercase=True, max_length=80) or "news"
-    slug = base_slug if base_slug not in used_slugs_en else f"{base_slug}-{hash_id(link)[:6]}"
+    slug = base_slug if base_slug not in used_slugs_en else f"{base_slug}-{sig[:6]}"
     used_slugs_en.add(slug)
 
     cover_url = None
@@ -231,18 +548,43 @@ async def process_entry(client: httpx.AsyncClient, feed_meta: dict, entry, used_
     if cover_url:
         cover_rel = await download_image(client, cover_url, COVERS_DIR, slug)
 
-    # rewrite EN + EL
-    body_en = await cf_rewrite(client, title, feed_text, "EN", source_name, link)
-    body_el = await cf_rewrite(client, title, feed_text, "EL", source_name, link)
-    if not body_el and body_en and DEEPL_API_KEY:
-        body_el = await deepl_translate(client, body_en)
+    description = feed_text[:240] or ""
+    title_el, description_el = title, description
+    # the same wire story often arrives through several feeds
+    vec = await cf_embed(client, feed_text) if SIMILARITY_THRESHOLD and feed_text else None
+    cached = await semantic_lookup(vec) if vec else None
+    if cached:
+        body_en = with_source_line(cached[0], cached[2], f"Source: {source_name} ({link})")
+        body_el = with_source_line(cached[1], cached[2], f"Πηγή: {source_name} ({link})")
+        if not (body_en and body_el):  # the other outlet's attribution could not be found and removed
+            cached = None
+    if not cached:
+        if DEEPL_API_KEY and len(feed_text) < DEEPL_SHORT_TEXT:
+            # short briefs: one EN generation, the Greek comes from DeepL below
+            body_en = await cf_rewrite(client, title, feed_text, "EN", source_name, link)
+            body_el = None
+        else:
+            # rewrite EN + EL, in one call when the model returns both
+            pair = await cf_rewrite_bilingual(client, title, feed_text, source_name, link)
+            if pair:
+                body_en, body_el = pair
+            else:
+                body_en = await cf_rewrite(client, title, feed_text, "EN", source_name, link)
+                body_el = await cf_rewrite(client, title, feed_text, "EL", source_name, link)
+        if not body_el and body_en and DEEPL_API_KEY:
+            # one request for all three fields
+            title_el, description_el, body_el = await deepl_translate(client, [title, description, body_en])
+        # body_el == body_en when DeepL failed and handed the English back
+        if vec and link and body_en and body_el and body_el != body_en:
+            semantic_store(vec, body_en, body_el, link)
 
     if not body_en:
         body_en = f"{title}\n\n{feed_text[:1000]}\n\nSource: {source_name} ({link})"
     if not body_el:
         body_el = f"{title}\n\n{feed_text[:1000]}\n\nΠηγή: {source_name} ({link})"
 
-    base_tags = list(set((entry.get("tags") and [t["term"] for t in entry["tags"]]) or []) | set(feed_meta.get("tags", [])))
+    # ordered dedupe keeps the front matter stable between runs
+    base_tags = list(dict.fromkeys(chain((t["term"] for t in entry.get("tags") or []), feed_meta.get("tags", []))))
     countries = [c for c in [feed_meta.get("country")] if c]
     teams = [t for t in [feed_meta.get("team")] if t]
 
@@ -261,40 +603,80 @@ async def process_entry(client: httpx.AsyncClient, feed_meta: dict, entry, used_
     if cover_rel:
         fm_common["cover"] = {"image": cover_rel, "alt": "", "caption": ""}
 
-    fm_en = {**fm_common, "title": title or "Update", "description": (feed_text[:240] or "")}
-    fm_el = {**fm_common, "title": title or "Ενημέρωση", "description": (feed_text[:240] or "")}
+    fm_en = {"title": title or "Update", "description": description, **fm_common}
+    fm_el = {"title": title_el or "Ενημέρωση", "description": description_el, **fm_common}
 
     path_en = CONTENT_EN / f"{slug}.md"
     path_el = CONTENT_EL / f"{slug}.md"
 
-    with path_en.open("w", encoding="utf-8") as f:
-        frontmatter.dump(frontmatter.Post(body_en.strip(), **fm_en), f)
-    with path_el.open("w", encoding="utf-8") as f:
-        frontmatter.dump(frontmatter.Post(body_el.strip(), **fm_el), f)
+    write_post(path_en, body_en, fm_en)
+    write_post(path_el, body_el, fm_el)
 
     return path_en, path_el
 
-async def process_feed(client: httpx.AsyncClient, feed_meta: dict, state: dict) -> int:
+async def process_feed(client: httpx.AsyncClient, feed_meta: dict, state: dict, state_lock: asyncio.Lock,
+                       used_slugs_en: set) -> int:
     url = feed_meta["url"]
-    d = feedparser.parse(url)
+    feed_cache = state.setdefault("seen_feeds", {}).get(url) or {}
+    req_headers = {}
+    if feed_cache.get("etag"):
+        req_headers["If-None-Match"] = feed_cache["etag"]
+    if feed_cache.get("last_modified"):
+        req_headers["If-Modified-Since"] = feed_cache["last_modified"]
+    resp = await client.get(url, headers=req_headers, timeout=20)
+    if resp.status_code == 304:
+        return 0
+    resp.raise_for_status()
+    # plenty of servers ignore conditional requests but serve identical bytes
+    body_hash = hashlib.blake2b(resp.content, digest_size=12).hexdigest()
+    if body_hash == feed_cache.get("hash"):
+        return 0
+    d = await asyncio.to_thread(parse_feed, resp.content, dict(resp.headers))
     seen = state.setdefault("seen", {})
-    new_count = 0
+    sem = asyncio.Semaphore(ENTRY_CONCURRENCY)
+    feed_host = urlparse(url).netloc or "source"  # attribution for entries without a link
 
-    used_slugs_en = {p.stem for p in CONTENT_EN.glob("*.md")}
-
-    for entry in d.entries[:20]:
+    async def _run(entry) -> bool:
         link = entry.get("link") or ""
+        sig = hash_id(link or clean_text(entry.get("title") or "") or url)
+        if sig in seen:  # most entries were posted on an earlier run
+            return False
         title = clean_text(entry.get("title") or "")
-        sig = hash_id(link or title or url)
-        if sig in seen:
-            continue
-
-        created = await process_entry(client, feed_meta, entry, used_slugs_en)
-        if created:
-            path_en, _ = created
-            seen[sig] = {"link": link, "title": title, "slug": path_en.stem, "ts": int(time.time())}
-            new_count += 1
-
+        source_host = urlparse(link).netloc or feed_host
+        base_slug = slugify(title or link, lowercase=True, max_length=80) or "news"
+        # entries and feeds run concurrently and often share articles: claim the sig before awaiting
+        async with state_lock:
+            if sig in seen:
+                return False
+            seen[sig] = {"link": link, "title": title, "slug": None, "ts": int(time.time())}
+
+        created = None
+        try:
+            async with sem:
+                created = await process_entry(client, feed_meta, entry, used_slugs_en, sig,
+                                              link, title, source_host, base_slug)
+        finally:
+            async with state_lock:
+                if created:
+                    path_en, _ = created
+                    seen[sig]["slug"] = path_en.stem
+                    append_seen(sig, seen[sig])
+                else:
+                    seen.pop(sig, None)
+        return bool(created)
+
+    results = await asyncio.gather(*[_run(e) for e in d.entries[:MAX_ENTRIES]], return_exceptions=True)
+    errors = [r for r in results if isinstance(r, BaseException)]
+    if errors:
+        raise errors[0]
+    new_count = sum(results)
+
+    # only remember validators once every entry has been handled
+    state["seen_feeds"][url] = {
+        "etag": resp.headers.get("etag"),
+        "last_modified": resp.headers.get("last-modified"),
+        "hash": body_hash,
+    }
     return new_count
 
 async def main():
@@ -302,17 +684,36 @@ async def main():
     feeds_spec = load_yaml(FEEDS_FILE) or {}
     sources = feeds_spec.get("sources", [])
     state = load_state()
+    state_lock = asyncio.Lock()
+    # shared by all feeds; process_entry adds every slug it takes
+    with os.scandir(CONTENT_EN) as it:
+        used_slugs_en = {e.name[:-3] for e in it if e.name.endswith(".md") and e.is_file()}
+    sem = asyncio.Semaphore(FEED_CONCURRENCY)
 
     headers = {"User-Agent": "NBA-EuroZone Rewriter/1.0"}
-    async with httpx.AsyncClient(follow_redirects=True, headers=headers) as client:
-        total_new = 0
-        for feed in sources:
-            try:
-                added = await process_feed(client, feed, state)
-                total_new += added
-            except Exception as e:
-                print(f"[WARN] Feed failed: {feed.get('url')} :: {e}")
-
+    # the run lasts minutes; keep idle connections to feed/CF/DeepL hosts warm between bursts
+    limits = httpx.Limits(max_connections=100, max_keepalive_connections=50, keepalive_expiry=30.0)
+    timeout = httpx.Timeout(30.0, connect=10.0)
+    async with httpx.AsyncClient(http2=True, follow_redirects=True, headers=headers,
+                                 limits=limits, timeout=timeout) as client:
+        async def _guarded(feed: dict) -> int:
+            async with sem:
+                return await process_feed(client, feed, state, state_lock, used_slugs_en)
+
+        results = await asyncio.gather(*[_guarded(f) for f in sources], return_exceptions=True)
+
+    total_new = 0
+    for feed, res in zip(sources, results):
+        if isinstance(res, BaseException):
+            print(f"[WARN] Feed failed: {feed.get('url')} :: {res}")
+        else:
+            total_new += res
+
+    close_llm_cache()
+    shutdown_cpu_pool()
+    # validators of feeds that were dropped from feeds.yml would otherwise stay forever
+    urls = {f.get("url") for f in sources}
+    state["seen_feeds"] = {u: v for u, v in state.get("seen_feeds", {}).items() if u in urls}
     save_state(state)
     print(f"Done. New posts: {total_new}")
 